@@ -1,9 +1,9 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Path, Query
-from fastapi.responses import FileResponse
-import os
-import tempfile
-from typing import Optional
-from enum import Enum
+from fastapi import Depends, FastAPI, HTTPException, File, Form, Path, Query, Request, UploadFile
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+import asyncio
+import httpx
+import orjson
+from typing import AsyncIterator, List, Optional
 
 from config import (
     OVERLEAF_BASE_URL,
@@ -11,47 +11,71 @@ from config import (
     OVERLEAF_EMAIL,
     OVERLEAF_PASSWORD
 )
-from overleaf_client import OverleafClient
+from overleaf_client import OverleafClient, CompilerType, COMPILE_TERMINAL_STATUSES, PDF_CACHE_MAX_BYTES
 
 app = FastAPI(
     title="Overleaf API",
     description="Overleaf API 服务，提供 LaTeX 文档编译和管理功能",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
-# 初始化 Overleaf 客户端
-client = OverleafClient(
-    base_url=OVERLEAF_BASE_URL,
-    # api_token=OVERLEAF_API_TOKEN,
-    email=OVERLEAF_EMAIL,
-    password=OVERLEAF_PASSWORD
-)
+# PDF 流式转发的分块大小
+PDF_CHUNK_SIZE = 64 * 1024
+# PDF 缓存控制：允许浏览器缓存 60 秒，过期后需用 ETag 重新校验
+PDF_CACHE_CONTROL = "private, max-age=60, must-revalidate"
+# 批量上传时读取文件的分块大小
+UPLOAD_CHUNK_SIZE = 64 * 1024
 
-class CompilerType(str, Enum):
+@app.on_event("startup")
+async def startup():
     """
-    支持的编译器类型
+    初始化 Overleaf 客户端并完成登录
+    
+    登录失败时抛出异常，服务在接受请求前即启动失败
     """
-    PDFLATEX = "pdflatex"
-    XELATEX = "xelatex"
-    LUALATEX = "lualatex"
-    LATEX = "latex"
+    app.state.client = await OverleafClient.create(
+        base_url=OVERLEAF_BASE_URL,
+        # api_token=OVERLEAF_API_TOKEN,
+        email=OVERLEAF_EMAIL,
+        password=OVERLEAF_PASSWORD
+    )
+
+@app.on_event("shutdown")
+async def shutdown():
+    """
+    关闭 Overleaf 客户端的连接池
+    """
+    client = getattr(app.state, "client", None)
+    if client is not None:
+        await client.aclose()
+
+def get_client(request: Request) -> OverleafClient:
+    """
+    获取应用启动时创建的 Overleaf 客户端
+    """
+    return request.app.state.client
 
 @app.get("/health")
-async def health_check():
+async def health_check(client: OverleafClient = Depends(get_client)):
     """
     检查服务健康状态
     """
-    if client.health_check():
+    if await client.health_check():
         return {"status": "healthy", "message": "服务运行正常"}
     raise HTTPException(status_code=503, detail="Overleaf 服务不可用")
 
 @app.post("/projects")
-async def create_project(name: str, template_id: Optional[str] = None):
+async def create_project(
+    name: str,
+    template_id: Optional[str] = None,
+    client: OverleafClient = Depends(get_client)
+):
     """
     创建新项目
     """
     try:
-        project = client.create_project(name, template_id)
+        project = await client.create_project(name, template_id)
         return project
     except RuntimeError as e:
         raise HTTPException(status_code=401, detail=str(e))
@@ -61,40 +85,85 @@ async def create_project(name: str, template_id: Optional[str] = None):
 @app.post("/projects/{project_id}/files")
 async def upload_file(
     project_id: str,
-    file: UploadFile = File(...),
-    file_name: Optional[str] = Form(None)
+    request: Request,
+    file_name: Optional[str] = Query(None, description="文件名（请求体为原始文件内容时必填）"),
+    client: OverleafClient = Depends(get_client)
 ):
     """
     上传文件到项目
+    
+    请求体直接以流的方式转发到 Overleaf，不在内存或磁盘中缓存完整文件：
+        - multipart/form-data 请求体（字段名 file）原样转发，文件名取自表单，
+          此时不能再指定 file_name（表单不会被解析，无法重命名）
+        - 其他请求体视为原始文件内容，需通过 file_name 指定文件名
     """
+    content_type = request.headers.get("content-type", "")
+    is_multipart = content_type.startswith("multipart/form-data")
+    if is_multipart and file_name:
+        raise HTTPException(
+            status_code=400,
+            detail="multipart 上传的文件名取自表单，不支持 file_name 参数；如需重命名请直接发送原始文件内容"
+        )
+    if not is_multipart and not file_name:
+        raise HTTPException(status_code=400, detail="上传原始文件内容时必须提供 file_name 参数")
     try:
-        # 创建临时文件
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_path = temp_file.name
-
-        try:
-            # 上传文件到 Overleaf
-            result = client.upload_file(
-                project_id=project_id,
-                file_path=temp_path,
-                file_name=file_name or file.filename
-            )
-            return result
-        finally:
-            # 清理临时文件
-            os.unlink(temp_path)
+        return await client.upload_file(
+            project_id=project_id,
+            content=request.stream(),
+            file_name=file_name,
+            content_type=content_type if is_multipart else None
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _iter_upload_file(file: UploadFile) -> AsyncIterator[bytes]:
+    """
+    分块读取上传的文件
+    """
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+async def _upload_one(client: OverleafClient, project_id: str, file: UploadFile) -> dict:
+    """
+    上传单个文件，返回该文件的上传结果（失败时包含错误信息）
+    """
+    try:
+        result = await client.upload_file(
+            project_id=project_id,
+            content=_iter_upload_file(file),
+            file_name=file.filename
+        )
+        return {"file_name": file.filename, "status": "success", "result": result}
+    except Exception as e:
+        return {"file_name": file.filename, "status": "error", "detail": str(e)}
+
+@app.post("/projects/{project_id}/files/batch")
+async def upload_files(
+    project_id: str,
+    files: List[UploadFile] = File(...),
+    client: OverleafClient = Depends(get_client)
+):
+    """
+    批量上传文件到项目
+    
+    所有文件并发上传（HTTP/2 下复用同一连接），总耗时约等于最慢的单个文件。
+    
+    Returns:
+        list: 每个文件的上传结果，顺序与请求中的文件一致
+    """
+    return await asyncio.gather(*(_upload_one(client, project_id, file) for file in files))
+
 @app.post("/projects/{project_id}/compile")
 async def compile_project(
     project_id: str = Path(..., description="项目ID"),
     compiler: CompilerType = Query(
         default=CompilerType.PDFLATEX,
         description="编译器类型"
-    )
+    ),
+    client: OverleafClient = Depends(get_client)
 ):
     """
     编译项目
@@ -116,11 +185,9 @@ async def compile_project(
             - 404: 项目不存在
     """
     try:
-        # 开始编译
-        compile_result = client.compile_project(project_id, compiler.value)
-        
-        # 等待编译完成
-        if not client.wait_for_compile(project_id):
+        # 编译并等待完成（项目文件未变化时直接使用缓存结果）
+        compile_result = await client.compile_cached(project_id, compiler)
+        if compile_result is None:
             raise HTTPException(status_code=500, detail="编译失败")
             
         return {
@@ -134,58 +201,218 @@ async def compile_project(
             detail=f"编译失败: {str(e)}"
         )
 
+@app.get("/projects/{project_id}/compile/events")
+async def compile_events(
+    project_id: str = Path(..., description="项目ID"),
+    timeout: int = Query(default=60, description="超时时间（秒）"),
+    client: OverleafClient = Depends(get_client)
+):
+    """
+    以 Server-Sent Events 推送编译状态，客户端无需自行轮询
+    
+    事件类型：
+        - status: 编译状态（data 为 JSON），状态为 success / error 后流结束
+        - timeout: 超时仍未完成
+        - error: 获取状态失败（data 中包含 detail）
+    """
+    async def event_stream():
+        status = {}
+        try:
+            async for status in client.watch_compile(project_id, timeout=timeout):
+                yield f"event: status\ndata: {orjson.dumps(status).decode()}\n\n"
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            yield f"event: error\ndata: {orjson.dumps({'detail': str(e)}).decode()}\n\n"
+            return
+        if status.get("status") not in COMPILE_TERMINAL_STATUSES:
+            yield "event: timeout\ndata: {}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+async def _tee_to_cache(client: OverleafClient, response: httpx.Response, cache_key: Optional[tuple]) -> AsyncIterator[bytes]:
+    """
+    原样转发 PDF 分块（不解码），同时在完整读取后写入编译缓存；结束或中断时关闭上游响应
+    """
+    # 上游仍对内容做了编码时，缓存的字节无法直接作为 PDF 返回
+    if response.headers.get("content-encoding", "identity") != "identity":
+        cache_key = None
+    chunks = [] if cache_key is not None else None
+    size = 0
+    try:
+        async for chunk in response.aiter_raw(PDF_CHUNK_SIZE):
+            if chunks is not None:
+                size += len(chunk)
+                if size > PDF_CACHE_MAX_BYTES:
+                    chunks = None
+                else:
+                    chunks.append(chunk)
+            yield chunk
+    finally:
+        # 客户端中途断开时也要释放上游连接（HTTP/2 下为共享连接上的一个流）
+        await response.aclose()
+    if chunks is not None:
+        client.cache_pdf(cache_key, b"".join(chunks))
+
+def _pdf_etag(key: tuple) -> str:
+    """
+    由编译缓存键生成强 ETag：编译器与项目文件摘要相同，则 PDF 相同
+    """
+    _, compiler, digest = key
+    return f'"{compiler}-{digest}"'
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    判断 If-None-Match 请求头是否与 ETag 匹配
+    """
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in ("*", etag):
+            return True
+    return False
+
+def _pdf_headers(
+    project_id: str,
+    upstream: Optional[httpx.Response] = None,
+    etag: Optional[str] = None
+) -> dict:
+    """
+    PDF 下载响应头，流式转发时原样带上上游的 Content-Length / Content-Encoding，
+    有 ETag 时附带缓存控制头（ETag 仅用于未编码的缓存内容，上游内容经过编码时不附带）
+    """
+    headers = {"Content-Disposition": f'attachment; filename="project_{project_id}.pdf"'}
+    if upstream is not None:
+        for name in ("content-length", "content-encoding"):
+            if name in upstream.headers:
+                headers[name] = upstream.headers[name]
+    if upstream is not None and upstream.headers.get("content-encoding", "identity") != "identity":
+        etag = None
+    if etag is not None:
+        headers["ETag"] = etag
+        headers["Cache-Control"] = PDF_CACHE_CONTROL
+    return headers
+
+def _not_modified_response(etag: str) -> Response:
+    """
+    内容未变化时的 304 响应
+    """
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": PDF_CACHE_CONTROL})
+
+def _cached_pdf_response(project_id: str, key: tuple, pdf: bytes, if_none_match: Optional[str] = None) -> Response:
+    """
+    返回编译缓存中的 PDF，附带 ETag；If-None-Match 匹配则返回 304
+    """
+    etag = _pdf_etag(key)
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return _not_modified_response(etag)
+    return Response(pdf, media_type="application/pdf", headers=_pdf_headers(project_id, etag=etag))
+
+async def _stream_pdf_response(client: OverleafClient, project_id: str, cache_key: Optional[tuple] = None) -> StreamingResponse:
+    """
+    从 Overleaf 流式获取 PDF，不落盘；指定 cache_key 时同时写入编译缓存并附带对应的 ETag
+    """
+    try:
+        response = await client.stream_pdf(project_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取 PDF 失败: {str(e)}")
+        
+    if response is None:
+        raise HTTPException(status_code=404, detail="PDF 文件不存在")
+        
+    # 检查文件大小
+    if response.headers.get("content-length") == "0":
+        await response.aclose()
+        raise HTTPException(status_code=500, detail="PDF 文件为空")
+        
+    return StreamingResponse(
+        _tee_to_cache(client, response, cache_key),
+        media_type="application/pdf",
+        headers=_pdf_headers(project_id, response, etag=_pdf_etag(cache_key) if cache_key is not None else None)
+    )
+
 @app.get("/projects/{project_id}/pdf")
-async def get_pdf(project_id: str):
+async def get_pdf(
+    project_id: str,
+    request: Request,
+    client: OverleafClient = Depends(get_client)
+):
     """
     获取编译后的 PDF
+    
+    优先返回本进程编译缓存中的 PDF（支持 ETag / If-None-Match，内容未变化时返回 304），
+    否则直接从 Overleaf 流式转发给客户端，不落盘。
+    本进程最近一次编译后项目文件未变化时，Overleaf 上的输出即该次编译的结果，
+    转发的同时写入缓存并附带 ETag；其他情况下的输出可能来自其他 worker 或 Overleaf 页面上的编译，
+    不写入缓存，也不附带 ETag
     """
-    temp_file = None
     try:
-        # 创建临时文件保存 PDF
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-        pdf_path = temp_file.name
-        temp_file.close()  # 关闭文件但不删除
+        key = await client.latest_compile_key(project_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取 PDF 失败: {str(e)}")
         
-        # 获取 PDF
-        if not client.get_pdf(project_id, pdf_path):
-            raise HTTPException(status_code=404, detail="PDF 文件不存在")
+    if key is None:
+        return await _stream_pdf_response(client, project_id)
         
-        # 检查文件是否成功创建
-        if not os.path.exists(pdf_path):
-            raise HTTPException(status_code=500, detail="PDF 文件生成失败")
-            
-        # 检查文件大小
-        if os.path.getsize(pdf_path) == 0:
-            raise HTTPException(status_code=500, detail="PDF 文件为空")
-            
-        return FileResponse(
-            pdf_path,
-            media_type="application/pdf",
-            filename=f"project_{project_id}.pdf",
-            background=None  # 同步删除文件
-        )
+    if_none_match = request.headers.get("if-none-match")
+    pdf = client.get_cached_pdf(key)
+    if pdf is not None:
+        return _cached_pdf_response(project_id, key, pdf, if_none_match)
+    # 缓存条目只有在本进程刚完成编译时才没有 PDF（命中缓存要求已有 PDF）
+    etag = _pdf_etag(key)
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return _not_modified_response(etag)
+    return await _stream_pdf_response(client, project_id, cache_key=key)
+
+@app.post("/projects/{project_id}/render")
+async def render(
+    project_id: str = Path(..., description="项目ID"),
+    compiler: CompilerType = Query(
+        default=CompilerType.PDFLATEX,
+        description="编译器类型"
+    ),
+    client: OverleafClient = Depends(get_client)
+):
+    """
+    编译项目并直接返回 PDF（推荐）
+    
+    在一次请求中完成“编译 → 等待完成 → 下载 PDF”，
+    省去客户端分别调用 /compile 与 /pdf 的往返。
     
-    except HTTPException:
-        # 重新抛出 HTTP 异常
-        raise
+    Raises:
+        HTTPException: 
+            - 500: 编译失败
+            - 404: PDF 文件不存在
+    """
+    try:
+        rendered = await client.render_cached(project_id, compiler)
     except Exception as e:
-        # 处理其他异常
-        raise HTTPException(status_code=500, detail=f"获取 PDF 失败: {str(e)}")
-    finally:
-        # 确保清理临时文件
-        if temp_file and os.path.exists(temp_file.name):
-            try:
-                os.unlink(temp_file.name)
-            except Exception:
-                pass
+        raise HTTPException(status_code=500, detail=f"编译失败: {str(e)}")
+        
+    if rendered is None:
+        raise HTTPException(status_code=500, detail="编译失败")
+        
+    key, pdf = rendered
+    if pdf is not None:
+        return _cached_pdf_response(project_id, key, pdf)
+    # 刚由本进程完成编译，Overleaf 上的输出即本次结果，边转发边写入缓存
+    return await _stream_pdf_response(client, project_id, cache_key=key)
 
 @app.get("/projects/{project_id}/files")
-async def get_project_files(project_id: str):
+async def get_project_files(
+    project_id: str,
+    client: OverleafClient = Depends(get_client)
+):
     """
     获取项目文件列表
     """
     try:
-        files = client.get_project_files(project_id)
+        files = await client.get_project_files(project_id)
         return files
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -194,24 +421,28 @@ async def get_project_files(project_id: str):
 async def update_file_content(
     project_id: str,
     file_id: str,
-    content: str = Form(...)
+    content: str = Form(...),
+    client: OverleafClient = Depends(get_client)
 ):
     """
     更新文件内容
     """
     try:
-        result = client.update_file(project_id, file_id, content)
+        result = await client.update_file(project_id, file_id, content)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/projects/{project_id}")
-async def delete_project(project_id: str):
+async def delete_project(
+    project_id: str,
+    client: OverleafClient = Depends(get_client)
+):
     """
     删除项目
     """
     try:
-        if client.delete_project(project_id):
+        if await client.delete_project(project_id):
             return {"status": "success", "message": "项目已删除"}
         raise HTTPException(status_code=404, detail="项目不存在")
     except Exception as e:
@@ -219,4 +450,13 @@ async def delete_project(project_id: str):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    # 已安装 uvloop / httptools 时自动使用（auto），否则回退到标准实现
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        loop="auto",
+        http="auto",
+        limit_concurrency=1000,
+        backlog=2048
+    ) 
\ No newline at end of file
@@ -0,0 +1,19 @@
+import os
+
+# Gunicorn 生产环境配置，启动方式：gunicorn -c gunicorn_conf.py app:app
+
+# 监听地址
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# 工作进程数，默认 2 * CPU 核数 + 1，可通过 WEB_CONCURRENCY 覆盖
+workers = int(os.getenv("WEB_CONCURRENCY", (os.cpu_count() or 1) * 2 + 1))
+
+# 使用 Uvicorn worker 运行 ASGI 应用，启用 uvloop / httptools，
+# 每个 worker 最多同时处理 1000 个连接（见 uvicorn_worker.py）
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# 等待 accept 的连接队列长度
+backlog = 2048
+
+# keep-alive 超时（秒），应大于前置负载均衡器的空闲超时
+keepalive = 65
@@ -1,10 +1,31 @@
-import os
-import requests
-import json
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import random
+import secrets
 import time
-from typing import Optional
+import httpx
+import orjson
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from types import MappingProxyType
+from typing import AsyncIterator, Dict, Optional, Tuple, Union
 from enum import Enum
 
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli  # noqa: F401
+    _ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        _ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        # 未安装 brotli / brotlicffi 时 httpx 无法解码 br 响应，不再声明支持
+        _ACCEPT_ENCODING = "gzip, deflate"
+
 class CompilerType(str, Enum):
     """
     支持的编译器类型
@@ -14,6 +35,200 @@ class CompilerType(str, Enum):
     LUALATEX = "lualatex"
     LATEX = "latex"
 
+# 各编译器对应的编译请求体，预先序列化，避免每次编译重复构造
+_COMPILE_PAYLOADS = MappingProxyType({
+    compiler: orjson.dumps({"compiler": compiler.value}) for compiler in CompilerType
+})
+
+# 编译状态轮询：从 0.1 秒开始按 1.5 倍退避，最长间隔 2 秒
+COMPILE_POLL_INITIAL_DELAY = 0.1
+COMPILE_POLL_MAX_DELAY = 2.0
+COMPILE_POLL_BACKOFF = 1.5
+COMPILE_TERMINAL_STATUSES = ("success", "error")
+
+# 连接池：默认上限（10 个连接）在并发下会让请求排队等待空闲连接
+HTTP_MAX_CONNECTIONS = 128
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 32
+HTTP_KEEPALIVE_EXPIRY = 60.0
+
+# 编译结果缓存：最多保留 128 条，每条 1 小时后过期；单个 PDF 超过 16 MiB 不缓存
+COMPILE_CACHE_MAXSIZE = 128
+COMPILE_CACHE_TTL = 3600
+PDF_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# 失败重试：连接错误由传输层重试；429 / 503 对所有请求重试，502 / 504 仅对幂等请求重试
+RETRY_MAX_ATTEMPTS = 3
+RETRY_MAX_DELAY = 30.0
+# 单个请求所有重试等待时间之和的上限（秒），超出时直接返回最后一次响应
+RETRY_TOTAL_BUDGET = 10.0
+# 请求扩展字段：设为 True 时不做状态码重试（如健康检查需要尽快反映后端状态）
+NO_RETRY_EXTENSION = "overleaf_no_retry"
+RETRY_JITTER = 0.2
+RETRY_ALWAYS_STATUSES = frozenset({429, 503})
+RETRY_IDEMPOTENT_STATUSES = frozenset({502, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """
+    计算下次重试前的等待时间：优先遵循 Retry-After，否则指数退避，并加入随机抖动
+    """
+    delay = float(2 ** attempt)
+    retry_after = response.headers.get("retry-after")
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                pass
+    return min(max(delay, 0.0), RETRY_MAX_DELAY) + random.uniform(0, RETRY_JITTER)
+
+class _RetryTransport(httpx.AsyncBaseTransport):
+    """
+    在底层传输之上按响应状态码重试，避免后端的瞬时限流 / 不可用直接变成用户可见的错误
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_attempts: int = RETRY_MAX_ATTEMPTS):
+        self._transport = transport
+        self._max_attempts = max_attempts
+
+    def _should_retry(self, request: httpx.Request, response: httpx.Response) -> bool:
+        if request.extensions.get(NO_RETRY_EXTENSION):
+            return False
+        if response.status_code in RETRY_ALWAYS_STATUSES:
+            return True
+        return response.status_code in RETRY_IDEMPOTENT_STATUSES and request.method in IDEMPOTENT_METHODS
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # 流式请求体（如上传）无法重放，不重试；需在发送前判断，底层传输读取后可能替换 request.stream
+        replayable = isinstance(request.stream, httpx.ByteStream)
+        attempt = 0
+        waited = 0.0
+        while True:
+            response = await self._transport.handle_async_request(request)
+            if attempt >= self._max_attempts or not replayable or not self._should_retry(request, response):
+                return response
+            delay = _retry_delay(response, attempt)
+            if waited + delay > RETRY_TOTAL_BUDGET:
+                return response
+            await response.aclose()
+            waited += delay
+            attempt += 1
+            logger.debug(
+                "%s %s 返回 %s，%.2f 秒后第 %d 次重试",
+                request.method, request.url, response.status_code, delay, attempt
+            )
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+def _lru_set(cache: "OrderedDict", key, value, maxsize: int = COMPILE_CACHE_MAXSIZE):
+    """
+    写入 LRU 字典，超出容量时淘汰最久未使用的条目
+    """
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > maxsize:
+        cache.popitem(last=False)
+
+async def _multipart_stream(content: AsyncIterator[bytes], boundary: str, file_name: str) -> AsyncIterator[bytes]:
+    """
+    将原始文件字节流封装为 multipart/form-data 请求体（字段名为 file），边读边发
+    """
+    # 按 WHATWG form-data 规则编码引号与换行，避免文件名注入额外的 part 头或提前结束头部
+    quoted_name = (
+        file_name.replace("\\", "\\\\")
+        .replace('"', "%22")
+        .replace("\r", "%0D")
+        .replace("\n", "%0A")
+    )
+    mime_type = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+    yield (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{quoted_name}"\r\n'
+        f"Content-Type: {mime_type}\r\n\r\n"
+    ).encode("utf-8")
+    async for chunk in content:
+        yield chunk
+    yield f"\r\n--{boundary}--\r\n".encode("utf-8")
+
+class CompilePoller:
+    """
+    共享的编译状态轮询器：同一项目无论有多少等待者，同一时刻只有一个轮询任务
+    """
+
+    def __init__(self, client: "OverleafClient"):
+        self._client = client
+        # 每个项目的轮询任务及其开始时间，任务结果为最终的编译状态
+        self._tasks: Dict[str, Tuple[float, asyncio.Task]] = {}
+        # 每个轮询任务当前的等待者数量，归零时取消轮询
+        self._waiters: Dict[asyncio.Task, int] = {}
+        # 每个项目最近一次发起编译（请求已返回）的时间
+        self._compiled_at: "OrderedDict[str, float]" = OrderedDict()
+
+    async def _poll(self, project_id: str) -> dict:
+        status = {}
+        async for status in self._client.watch_compile(project_id):
+            pass
+        return status
+
+    def _forget(self, project_id: str, task: asyncio.Task):
+        current = self._tasks.get(project_id)
+        if current is not None and current[1] is task:
+            del self._tasks[project_id]
+
+    def compile_started(self, project_id: str):
+        """
+        记录项目刚发起了一次编译；此前开始的轮询可能读到上一次编译的最终状态，不再复用
+        
+        Args:
+            project_id: 项目ID
+        """
+        _lru_set(self._compiled_at, project_id, asyncio.get_running_loop().time())
+
+    async def wait(self, project_id: str) -> dict:
+        """
+        等待项目编译结束
+        
+        Args:
+            project_id: 项目ID
+            
+        Returns:
+            dict: 最终的编译状态（status 为 success 或 error）
+        """
+        loop = asyncio.get_running_loop()
+        current = self._tasks.get(project_id)
+        compiled_at = self._compiled_at.get(project_id)
+        if current is None or (compiled_at is not None and current[0] < compiled_at):
+            task = asyncio.create_task(self._poll(project_id))
+            self._tasks[project_id] = (loop.time(), task)
+            task.add_done_callback(lambda t: self._forget(project_id, t))
+        else:
+            task = current[1]
+
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            # shield：单个等待者超时或取消时不影响其他等待者共享的轮询任务
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    task.cancel()
+                    # 立即移除，避免随后到达的等待者拿到正在被取消的任务
+                    self._forget(project_id, task)
+
+    def close(self):
+        """
+        取消所有进行中的轮询任务
+        """
+        for _, task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
 class OverleafClient:
     def __init__(self, base_url: str, api_token: Optional[str] = None, email: Optional[str] = None, password: Optional[str] = None):
         """
@@ -27,33 +242,127 @@ class OverleafClient:
             
         注意：
             - 如果提供 api_token，将优先使用 token 认证
-            - 如果同时提供 email 和 password，将自动进行登录
+            - 如果同时提供 email 和 password，需要调用 await authenticate() 完成登录，
+              或直接使用 await OverleafClient.create(...) 创建已登录的客户端
             - 如果都未提供，将以未认证状态初始化
         """
         self.base_url = base_url
-        self.session = requests.Session()
         self.authenticated = False
+        self._email = email
+        self._password = password
         
         # 设置基本请求头
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
             "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Connection": "keep-alive"
+            "Accept-Encoding": _ACCEPT_ENCODING
         }
         
         # 优先使用 token 认证
+        self._token = api_token
         if api_token:
-            self.headers["Authorization"] = f"Bearer {api_token}"
             self.authenticated = True
-        # 如果提供邮箱和密码，尝试登录
-        elif email and password:
-            self.authenticated = self.login(email, password)
+
+        # 编译结果缓存，键为 (项目ID, 编译器, 文件列表摘要)
+        self._cache: "OrderedDict[tuple, dict]" = OrderedDict()
+        # 每个项目最近一次编译对应的缓存键（LRU，容量同编译缓存）
+        self._latest_keys: "OrderedDict[str, tuple]" = OrderedDict()
+
+        # 编译状态轮询器，同一项目的并发等待共享一个轮询任务
+        self._poller = CompilePoller(self)
+
+        # 项目文件列表缓存（LRU，容量同编译缓存），值为 (ETag, Last-Modified, 文件列表)，用于条件请求
+        self._files_cache: "OrderedDict[str, Tuple[Optional[str], Optional[str], dict]]" = OrderedDict()
+
+        # 全局共享的异步 HTTP 客户端，复用连接池和 keep-alive 连接
+        # 启用 HTTP/2 后，同一源站的并发请求会复用同一条连接（多路复用）
+        # 传输层自动重试连接失败，_RetryTransport 再按状态码重试
+        transport = httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=RETRY_MAX_ATTEMPTS,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers=self.headers,
+            auth=self._apply_auth,
+            transport=_RetryTransport(transport)
+        )
+
+    @classmethod
+    async def create(
+        cls,
+        base_url: str,
+        api_token: Optional[str] = None,
+        email: Optional[str] = None,
+        password: Optional[str] = None
+    ) -> "OverleafClient":
+        """
+        创建客户端并完成登录（同时预热到 Overleaf 的连接）
+        
+        Args:
+            base_url: Overleaf 服务器地址
+            api_token: API 令牌（可选）
+            email: 用户邮箱（可选）
+            password: 用户密码（可选）
             
-        self.session.headers.update(self.headers)
+        Returns:
+            OverleafClient: 已完成初始化的客户端
+            
+        Raises:
+            RuntimeError: 如果提供了邮箱和密码但登录失败
+        """
+        client = cls(base_url, api_token=api_token, email=email, password=password)
+        try:
+            if not await client.authenticate() and email and password:
+                raise RuntimeError("Overleaf 登录失败，请检查 EMAIL/PASSWORD 配置")
+        except BaseException:
+            await client.aclose()
+            raise
+        return client
+
+    def _apply_auth(self, request: httpx.Request) -> httpx.Request:
+        """
+        为每个请求附加认证头，避免在运行时修改共享客户端的默认请求头
+        """
+        if self._token:
+            request.headers["Authorization"] = f"Bearer {self._token}"
+        return request
+
+    async def _post_json(self, url: str, data: Union[dict, bytes]) -> httpx.Response:
+        """
+        以 JSON 请求体发送 POST 请求（使用 orjson 序列化，bytes 视为已序列化的请求体）
+        """
+        return await self._client.post(
+            url,
+            content=data if isinstance(data, bytes) else orjson.dumps(data),
+            headers={"Content-Type": "application/json"}
+        )
+
+    async def authenticate(self) -> bool:
+        """
+        使用初始化时提供的邮箱和密码登录（如已通过 token 认证则直接返回）
+
+        Returns:
+            bool: 客户端是否已认证
+        """
+        if not self.authenticated and self._email and self._password:
+            await self.login(self._email, self._password)
+        return self.authenticated
+
+    async def aclose(self):
+        """
+        关闭底层 HTTP 客户端，释放连接池
+        """
+        self._poller.close()
+        await self._client.aclose()
     
-    def login(self, email: str, password: str) -> bool:
+    async def login(self, email: str, password: str) -> bool:
         """
         使用邮箱和密码登录
         
@@ -69,15 +378,14 @@ class OverleafClient:
             "email": email,
             "password": password
         }
-        response = self.session.post(url, json=data)
+        response = await self._post_json(url, data)
         self.authenticated = response.status_code == 200
         
         # 如果登录成功，从响应中获取并设置 token（如果服务器提供）
         if self.authenticated:
-            token = response.headers.get("X-Auth-Token") or response.json().get("token")
+            token = response.headers.get("X-Auth-Token") or orjson.loads(response.content).get("token")
             if token:
-                self.headers["Authorization"] = f"Bearer {token}"
-                self.session.headers.update(self.headers)
+                self._token = token
                 
         return self.authenticated
     
@@ -91,7 +399,7 @@ class OverleafClient:
         if not self.authenticated:
             raise RuntimeError("需要先进行认证。请使用 API token 初始化客户端或调用 login() 方法。")
     
-    def create_project(self, name: str, template_id: Optional[str] = None) -> dict:
+    async def create_project(self, name: str, template_id: Optional[str] = None) -> dict:
         """
         创建新项目
         
@@ -113,33 +421,45 @@ class OverleafClient:
         if template_id:
             data["template"] = template_id
             
-        response = self.session.post(url, json=data)
-        return response.json()
+        response = await self._post_json(url, data)
+        return orjson.loads(response.content)
 
-    def upload_file(self, project_id: str, file_path: str, file_name: Optional[str] = None) -> dict:
+    async def upload_file(
+        self,
+        project_id: str,
+        content: AsyncIterator[bytes],
+        file_name: Optional[str] = None,
+        content_type: Optional[str] = None
+    ) -> dict:
         """
-        上传LaTeX文件
+        以流式方式上传LaTeX文件，不在内存或磁盘中缓存完整文件
         
         Args:
             project_id: 项目ID
-            file_path: 文件路径
-            file_name: 文件名（可选，默认使用file_path的文件名）
+            content: 文件内容的异步字节流
+            file_name: 文件名（content 为原始文件内容时必填）
+            content_type: 若 content 已是完整的 multipart/form-data 请求体，
+                          传入其 Content-Type（含 boundary），将原样转发
             
         Returns:
             dict: 上传响应信息
+            
+        Raises:
+            ValueError: 如果上传原始文件内容时未提供文件名
         """
-        if not file_name:
-            file_name = os.path.basename(file_path)
+        if content_type is None:
+            if not file_name:
+                raise ValueError("上传原始文件内容时必须提供文件名")
+            boundary = secrets.token_hex(16)
+            content_type = f"multipart/form-data; boundary={boundary}"
+            content = _multipart_stream(content, boundary, file_name)
             
+        self.invalidate_cache(project_id)
         url = f"{self.base_url}/project/{project_id}/file"
-        
-        with open(file_path, "rb") as f:
-            files = {"file": (file_name, f)}
-            response = self.session.post(url, files=files)
-            
-        return response.json()
+        response = await self._client.post(url, content=content, headers={"Content-Type": content_type})
+        return orjson.loads(response.content)
 
-    def compile_project(self, project_id: str, compiler: str = CompilerType.PDFLATEX) -> dict:
+    async def compile_project(self, project_id: str, compiler: str = CompilerType.PDFLATEX) -> dict:
         """
         编译项目
         
@@ -150,51 +470,224 @@ class OverleafClient:
         Returns:
             dict: 编译响应信息
         """
-        if isinstance(compiler, CompilerType):
-            compiler = compiler.value
+        # 内置编译器使用预先序列化好的请求体（str 枚举与其值的哈希相同，可直接查表）
+        data = _COMPILE_PAYLOADS.get(compiler)
+        if data is None:
+            data = {"compiler": compiler}
             
         url = f"{self.base_url}/project/{project_id}/compile"
-        data = {
-            "compiler": compiler
+        response = await self._post_json(url, data)
+        self._poller.compile_started(project_id)
+        return orjson.loads(response.content)
+
+    async def _files_digest(self, project_id: str) -> str:
+        """
+        计算项目文件列表的摘要，文件未变化时摘要不变
+        """
+        files = await self.get_project_files(project_id)
+        canonical = orjson.dumps(files, option=orjson.OPT_SORT_KEYS)
+        return hashlib.blake2b(canonical, digest_size=16).hexdigest()
+
+    def _cache_get(self, key: tuple) -> Optional[dict]:
+        """
+        读取未过期的缓存条目，并将其标记为最近使用
+        """
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry["expires_at"]:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return entry
+
+    def _cache_put(self, key: tuple, compile_result: dict) -> dict:
+        """
+        写入缓存条目，超出容量时淘汰最久未使用的条目
+        """
+        entry = {
+            "compile_result": compile_result,
+            "pdf": None,
+            "expires_at": time.monotonic() + COMPILE_CACHE_TTL
         }
+        _lru_set(self._cache, key, entry)
+        return entry
+
+    def invalidate_cache(self, project_id: str):
+        """
+        清除项目的所有编译缓存
+        
+        Args:
+            project_id: 项目ID
+        """
+        for key in [key for key in self._cache if key[0] == project_id]:
+            del self._cache[key]
+        self._latest_keys.pop(project_id, None)
+
+    async def _compile_entry(self, project_id: str, compiler: str, timeout: int) -> Optional[Tuple[tuple, dict, bool]]:
+        """
+        编译项目并等待完成，项目文件未变化且缓存条目已有 PDF 时复用缓存条目
         
-        response = self.session.post(url, json=data)
-        return response.json()
+        跳过编译时 Overleaf 上的输出仍是最后一次编译的结果（可能来自其他编译器），
+        只有已缓存了 PDF 的条目才能在不编译的情况下保证随后获取的 PDF 与之对应。
+        
+        Returns:
+            Optional[Tuple[tuple, dict, bool]]: (缓存键, 缓存条目, 是否刚刚完成编译)，编译失败或超时返回 None
+        """
+        if isinstance(compiler, CompilerType):
+            compiler = compiler.value
+
+        key = (project_id, compiler, await self._files_digest(project_id))
+        entry = self._cache_get(key)
+        compiled = False
+        if entry is None or entry["pdf"] is None:
+            compile_result = await self.compile_project(project_id, compiler)
+            if not await self.wait_for_compile(project_id, timeout):
+                return None
+            entry = self._cache_put(key, compile_result)
+            compiled = True
 
-    def get_pdf(self, project_id: str, output_path: str) -> bool:
+        _lru_set(self._latest_keys, project_id, key)
+        return key, entry, compiled
+
+    async def compile_cached(self, project_id: str, compiler: str = CompilerType.PDFLATEX, timeout: int = 60) -> Optional[dict]:
         """
-        获取编译后的 PDF
+        编译项目并等待完成；若项目文件自上次编译后未变化且该次编译的 PDF 已缓存，直接返回缓存的编译结果
         
         Args:
             project_id: 项目ID
-            output_path: PDF输出路径
+            compiler: 编译器类型，默认为 pdflatex
+            timeout: 等待编译的超时时间（秒）
             
         Returns:
-            bool: 是否成功获取PDF
+            Optional[dict]: 编译响应信息，编译失败或超时返回 None
         """
-        try:
-            self._ensure_auth()
-            url = f"{self.base_url}/project/{project_id}/output/output.pdf"
+        result = await self._compile_entry(project_id, compiler, timeout)
+        if result is None:
+            return None
+        return result[1]["compile_result"]
+
+    async def render_cached(
+        self,
+        project_id: str,
+        compiler: str = CompilerType.PDFLATEX,
+        timeout: int = 60
+    ) -> Optional[Tuple[tuple, Optional[bytes]]]:
+        """
+        为获取 PDF 而编译项目：缓存中已有该次编译的 PDF 时直接返回，否则重新编译
+        
+        Overleaf 上的输出可能被其他 worker 或 Overleaf 页面上的编译覆盖，
+        因此只有刚刚由本进程完成的编译，其输出才可以写入缓存。
+        
+        Args:
+            project_id: 项目ID
+            compiler: 编译器类型，默认为 pdflatex
+            timeout: 等待编译的超时时间（秒）
             
-            response = self.session.get(url, stream=True)
-            if response.status_code != 200:
-                return False
+        Returns:
+            Optional[Tuple[tuple, Optional[bytes]]]: (缓存键, 缓存的 PDF)，编译失败或超时返回 None。
+                PDF 为 None 表示刚刚完成编译，调用方应立即获取 PDF 并通过 cache_pdf(key, ...) 写入缓存
+        """
+        result = await self._compile_entry(project_id, compiler, timeout)
+        if result is None:
+            return None
+        key, entry, compiled = result
+        return key, None if compiled else entry["pdf"]
+
+    async def latest_compile_key(self, project_id: str, verify: bool = True) -> Optional[tuple]:
+        """
+        获取项目最近一次编译的缓存键
+        
+        Args:
+            project_id: 项目ID
+            verify: 是否重新校验项目文件未发生变化
             
-            # 确保目标目录存在
-            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        Returns:
+            Optional[tuple]: 缓存键，未编译、缓存已过期或文件已变化时返回 None
+        """
+        key = self._latest_keys.get(project_id)
+        if key is None or self._cache_get(key) is None:
+            return None
+        if verify and await self._files_digest(project_id) != key[2]:
+            return None
+        return key
+
+    def get_cached_pdf(self, key: tuple) -> Optional[bytes]:
+        """
+        获取编译缓存中的 PDF
+        
+        Args:
+            key: 缓存键（见 latest_compile_key）
             
-            # 分块写入文件
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+        Returns:
+            Optional[bytes]: 缓存的 PDF 内容，未缓存时返回 None
+        """
+        entry = self._cache_get(key)
+        if entry is None:
+            return None
+        return entry["pdf"]
+
+    def cache_pdf(self, key: tuple, pdf: bytes):
+        """
+        将 PDF 内容关联到对应的编译缓存条目
+        
+        Args:
+            key: 缓存键（见 render_cached）
+            pdf: PDF 内容
+        """
+        if len(pdf) > PDF_CACHE_MAX_BYTES:
+            return
+        entry = self._cache_get(key)
+        if entry is not None:
+            entry["pdf"] = pdf
+
+    async def stream_pdf(self, project_id: str) -> Optional[httpx.Response]:
+        """
+        以流式方式获取编译后的 PDF，响应体不会被预先读取
+        
+        Args:
+            project_id: 项目ID
             
-            return True
-        except Exception as e:
-            print(f"获取 PDF 失败: {str(e)}")  # 添加日志
-            return False
+        Returns:
+            Optional[httpx.Response]: 已打开的流式响应，PDF 不存在时返回 None。
+                调用方需通过 aiter_raw() / aiter_bytes() 读取内容，并在结束后调用 aclose() 释放连接
+        """
+        self._ensure_auth()
+        url = f"{self.base_url}/project/{project_id}/output/output.pdf"
+        
+        # PDF 内部已压缩，要求上游不再额外编码，省去一次完整的解压
+        request = self._client.build_request("GET", url, headers={"Accept-Encoding": "identity"})
+        response = await self._client.send(request, stream=True)
+        if response.status_code != 200:
+            await response.aclose()
+            return None
+        return response
+
+    async def watch_compile(self, project_id: str, timeout: Optional[float] = None) -> AsyncIterator[dict]:
+        """
+        轮询编译状态并逐个产出，轮询间隔按指数退避增长
+        
+        Args:
+            project_id: 项目ID
+            timeout: 超时时间（秒，可选），超时后停止轮询
+            
+        Yields:
+            dict: 每次轮询得到的编译状态，遇到 success / error 后结束
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        delay = COMPILE_POLL_INITIAL_DELAY
+        while True:
+            status = await self.get_compile_status(project_id)
+            yield status
+            if status.get("status") in COMPILE_TERMINAL_STATUSES:
+                return
+            if deadline is not None and loop.time() + delay > deadline:
+                return
+            await asyncio.sleep(delay)
+            delay = min(delay * COMPILE_POLL_BACKOFF, COMPILE_POLL_MAX_DELAY)
 
-    def wait_for_compile(self, project_id: str, timeout: int = 60) -> bool:
+    async def wait_for_compile(self, project_id: str, timeout: int = 60) -> bool:
         """
         等待编译完成
         
@@ -205,17 +698,13 @@ class OverleafClient:
         Returns:
             bool: 编译是否成功完成
         """
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            status = self.get_compile_status(project_id)
-            if status.get("status") == "success":
-                return True
-            elif status.get("status") == "error":
-                return False
-            time.sleep(2)
-        return False
+        try:
+            status = await asyncio.wait_for(self._poller.wait(project_id), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return status.get("status") == "success"
 
-    def get_compile_status(self, project_id: str) -> dict:
+    async def get_compile_status(self, project_id: str) -> dict:
         """
         获取编译状态
         
@@ -226,10 +715,10 @@ class OverleafClient:
             dict: 包含编译状态信息的字典
         """
         url = f"{self.base_url}/project/{project_id}/compile/status"
-        response = self.session.get(url)
-        return response.json()
+        response = await self._client.get(url)
+        return orjson.loads(response.content)
 
-    def get_project_files(self, project_id: str) -> dict:
+    async def get_project_files(self, project_id: str) -> dict:
         """
         获取项目文件列表
         
@@ -242,14 +731,36 @@ class OverleafClient:
         try:
             self._ensure_auth()
             url = f"{self.base_url}/project/{project_id}/files"
-            response = self.session.get(url)
+            
+            # 条件请求：文件列表未变化时服务器返回 304，直接复用上次的结果
+            headers = {}
+            cached = self._files_cache.get(project_id)
+            if cached is not None:
+                self._files_cache.move_to_end(project_id)
+                etag, last_modified, _ = cached
+                if etag:
+                    headers["If-None-Match"] = etag
+                if last_modified:
+                    headers["If-Modified-Since"] = last_modified
+                    
+            response = await self._client.get(url, headers=headers)
+            if response.status_code == 304 and cached is not None:
+                return cached[2]
             response.raise_for_status()  # 抛出非 2xx 响应的异常
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"获取文件列表失败: {str(e)}")  # 添加日志
+            
+            files = orjson.loads(response.content)
+            etag = response.headers.get("etag")
+            last_modified = response.headers.get("last-modified")
+            if etag or last_modified:
+                _lru_set(self._files_cache, project_id, (etag, last_modified, files))
+            else:
+                self._files_cache.pop(project_id, None)
+            return files
+        except httpx.HTTPError as e:
+            logger.warning("获取文件列表失败: %s", e)
             raise RuntimeError(f"获取文件列表失败: {str(e)}")
 
-    def update_file(self, project_id: str, file_id: str, content: str) -> dict:
+    async def update_file(self, project_id: str, file_id: str, content: str) -> dict:
         """
         更新文件内容
         
@@ -261,12 +772,13 @@ class OverleafClient:
         Returns:
             dict: 更新响应信息
         """
+        self.invalidate_cache(project_id)
         url = f"{self.base_url}/project/{project_id}/file/{file_id}"
         data = {"content": content}
-        response = self.session.post(url, json=data)
-        return response.json()
+        response = await self._post_json(url, data)
+        return orjson.loads(response.content)
 
-    def delete_project(self, project_id: str) -> bool:
+    async def delete_project(self, project_id: str) -> bool:
         """
         删除项目
         
@@ -276,11 +788,13 @@ class OverleafClient:
         Returns:
             bool: 是否成功删除
         """
+        self.invalidate_cache(project_id)
+        self._files_cache.pop(project_id, None)
         url = f"{self.base_url}/project/{project_id}"
-        response = self.session.delete(url)
+        response = await self._client.delete(url)
         return response.status_code == 200
 
-    def health_check(self) -> bool:
+    async def health_check(self) -> bool:
         """
         检查服务器状态
         
@@ -288,5 +802,6 @@ class OverleafClient:
             bool: 服务器是否正常运行
         """
         url = f"{self.base_url}/health"
-        response = self.session.get(url)
+        # 健康检查不重试，后端不可用时立即如实返回
+        response = await self._client.get(url, extensions={NO_RETRY_EXTENSION: True})
         return response.status_code == 200
@@ -0,0 +1,142 @@
+import os
+import sys
+
+import httpx
+import orjson
+import pytest
+
+# 项目模块位于仓库根目录
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app 导入时会校验配置，测试中使用占位值
+os.environ.setdefault("OVERLEAF_BASE_URL", "https://overleaf.test")
+os.environ.setdefault("OVERLEAF_EMAIL", "test@example.com")
+os.environ.setdefault("OVERLEAF_PASSWORD", "password")
+
+from overleaf_client import OverleafClient, _RetryTransport  # noqa: E402
+
+BASE_URL = "https://overleaf.test"
+
+@pytest.fixture
+def make_client():
+    """
+    创建以 httpx.MockTransport 模拟 Overleaf 后端的客户端
+    """
+    def factory(handler) -> OverleafClient:
+        client = OverleafClient(BASE_URL, api_token="token")
+        client._client = httpx.AsyncClient(
+            base_url=BASE_URL,
+            auth=client._apply_auth,
+            transport=_RetryTransport(httpx.MockTransport(handler))
+        )
+        return client
+
+    return factory
+
+class TrackedStream(httpx.AsyncByteStream):
+    """
+    分块产出的响应体，记录是否已被关闭
+    """
+
+    def __init__(self, content: bytes, chunk_size: int = 4):
+        self.content = content
+        self.chunk_size = chunk_size
+        self.closed = False
+
+    async def __aiter__(self):
+        for i in range(0, len(self.content), self.chunk_size):
+            yield self.content[i:i + self.chunk_size]
+
+    async def aclose(self):
+        self.closed = True
+
+class FakeOverleaf:
+    """
+    内存中的 Overleaf 后端：文件列表带 ETag，编译输出即 "%PDF-<编译器>-<文件版本>"
+    """
+
+    def __init__(self):
+        self.version = 1
+        self.compile_status = "success"
+        # 依次返回的编译状态，用完后一直返回 compile_status
+        self.statuses = []
+        self.compiles = []
+        self.uploads = []
+        self.outputs = {}
+        self.pdf_streams = []
+        self.pdf_fetches = 0
+        self.upload_response = None
+        # 上传时返回 500 的文件名
+        self.failing_uploads = set()
+
+    def pdf_for(self, compiler: str) -> bytes:
+        return f"%PDF-{compiler}-{self.version}".encode()
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        parts = request.url.path.strip("/").split("/")
+        if parts == ["health"]:
+            return httpx.Response(200)
+        project_id, rest = parts[1], parts[2:]
+        if request.method == "GET" and rest == ["files"]:
+            etag = f'"{self.version}"'
+            if request.headers.get("if-none-match") == etag:
+                return httpx.Response(304)
+            listing = {"files": [f"v{self.version}.tex"]}
+            return httpx.Response(200, headers={"ETag": etag}, content=orjson.dumps(listing))
+        if request.method == "POST" and rest == ["compile"]:
+            compiler = orjson.loads(request.content)["compiler"]
+            self.compiles.append((project_id, compiler))
+            self.outputs[project_id] = self.pdf_for(compiler)
+            return httpx.Response(200, content=b'{"status": "started"}')
+        if request.method == "GET" and rest == ["compile", "status"]:
+            status = self.statuses.pop(0) if self.statuses else self.compile_status
+            if status is None:
+                return httpx.Response(500, content=b"<html>Internal Server Error</html>")
+            return httpx.Response(200, content=orjson.dumps({"status": status}))
+        if request.method == "GET" and rest == ["output", "output.pdf"]:
+            self.pdf_fetches += 1
+            if project_id not in self.outputs:
+                return httpx.Response(404)
+            stream = TrackedStream(self.outputs[project_id])
+            self.pdf_streams.append(stream)
+            return httpx.Response(
+                200,
+                headers={"Content-Length": str(len(stream.content))},
+                stream=stream
+            )
+        if request.method == "POST" and rest[:1] == ["file"]:
+            body = await request.aread()
+            if any(f'filename="{name}"'.encode() in body for name in self.failing_uploads):
+                return httpx.Response(500, content=b"<html>Internal Server Error</html>")
+            self.uploads.append((project_id, request.headers["content-type"], body))
+            self.version += 1
+            if self.upload_response is not None:
+                return self.upload_response
+            return httpx.Response(200, content=b'{"status": "ok"}')
+        if request.method == "DELETE" and not rest:
+            self.version += 1
+            return httpx.Response(200)
+        return httpx.Response(404)
+
+@pytest.fixture
+def overleaf():
+    return FakeOverleaf()
+
+@pytest.fixture
+def client(make_client, overleaf):
+    return make_client(overleaf.handler)
+
+@pytest.fixture
+def api(client):
+    """
+    接入模拟后端的 FastAPI 测试客户端（不触发 startup 登录）
+    """
+    from fastapi.testclient import TestClient
+
+    from app import app, get_client
+
+    app.dependency_overrides[get_client] = lambda: client
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,20 @@
+def test_batch_upload_reports_each_file(api, overleaf):
+    overleaf.failing_uploads = {"broken.tex"}
+    response = api.post(
+        "/projects/p/files/batch",
+        files=[
+            ("files", ("main.tex", b"main", "text/plain")),
+            ("files", ("broken.tex", b"broken", "text/plain")),
+            ("files", ("refs.bib", b"refs", "text/plain")),
+        ]
+    )
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["file_name"] for result in results] == ["main.tex", "broken.tex", "refs.bib"]
+    assert [result["status"] for result in results] == ["success", "error", "success"]
+    assert results[0]["result"] == {"status": "ok"}
+    assert "detail" in results[1]
+
+    uploaded = {body.split(b'filename="')[1].split(b'"')[0]: body for _, _, body in overleaf.uploads}
+    assert set(uploaded) == {b"main.tex", b"refs.bib"}
+    assert b"\r\n\r\nmain\r\n" in uploaded[b"main.tex"]
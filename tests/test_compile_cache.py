@@ -0,0 +1,61 @@
+import overleaf_client
+from overleaf_client import COMPILE_CACHE_MAXSIZE, COMPILE_CACHE_TTL, OverleafClient
+
+def test_compiler_switch_recompiles_before_pdf(api, overleaf):
+    for compiler in ("xelatex", "pdflatex", "xelatex"):
+        assert api.post("/projects/p/compile", params={"compiler": compiler}).status_code == 200
+    # 第三次编译不能命中缓存，否则 Overleaf 上的输出仍是 pdflatex 的结果
+    assert overleaf.compiles == [("p", "xelatex"), ("p", "pdflatex"), ("p", "xelatex")]
+    assert api.get("/projects/p/pdf").content == overleaf.pdf_for("xelatex")
+
+def test_compile_hit_after_render(api, overleaf):
+    api.post("/projects/p/render")
+    response = api.post("/projects/p/compile")
+    assert response.status_code == 200
+    assert response.json()["compile_result"] == {"status": "started"}
+    assert overleaf.compiles == [("p", "pdflatex")]
+
+def test_upload_invalidates_cache(api, client, overleaf):
+    api.post("/projects/p/render")
+    api.post("/projects/p/files", params={"file_name": "notes.txt"}, content=b"hello")
+    assert not client._cache
+    response = api.post("/projects/p/render")
+    assert response.content == overleaf.pdf_for("pdflatex")
+    assert len(overleaf.compiles) == 2
+
+def test_update_invalidates_cache(api, client, overleaf):
+    api.post("/projects/p/render")
+    assert api.put("/projects/p/files/f1", data={"content": "new"}).status_code == 200
+    assert not client._cache
+    api.post("/projects/p/render")
+    assert len(overleaf.compiles) == 2
+
+def test_delete_invalidates_cache(api, client, overleaf):
+    api.post("/projects/p/render")
+    assert api.delete("/projects/p").status_code == 200
+    assert not client._cache
+    assert "p" not in client._latest_keys
+    assert "p" not in client._files_cache
+
+def test_invalidation_is_per_project(api, client, overleaf):
+    api.post("/projects/p/render")
+    api.post("/projects/q/render")
+    client.invalidate_cache("p")
+    assert [key[0] for key in client._cache] == ["q"]
+
+def test_compile_cache_lru_and_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(overleaf_client.time, "monotonic", lambda: now[0])
+    client = OverleafClient("https://overleaf.test", api_token="token")
+
+    for i in range(COMPILE_CACHE_MAXSIZE):
+        client._cache_put((i,), {"status": "success"})
+    assert client._cache_get((0,)) is not None
+    client._cache_put(("new",), {"status": "success"})
+    # 1 最久未使用，被淘汰
+    assert len(client._cache) == COMPILE_CACHE_MAXSIZE
+    assert client._cache_get((1,)) is None
+    assert client._cache_get((0,)) is not None
+
+    now[0] += COMPILE_CACHE_TTL + 1
+    assert client._cache_get((0,)) is None
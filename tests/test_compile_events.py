@@ -0,0 +1,36 @@
+import orjson
+
+def parse_events(text: str) -> list:
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((fields["event"], orjson.loads(fields["data"])))
+    return events
+
+def test_events_until_terminal_status(api, overleaf):
+    overleaf.statuses = ["running", "running"]
+    response = api.get("/projects/p/compile/events")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    assert parse_events(response.text) == [
+        ("status", {"status": "running"}),
+        ("status", {"status": "running"}),
+        ("status", {"status": "success"}),
+    ]
+
+def test_timeout_event(api, overleaf):
+    overleaf.compile_status = "running"
+    response = api.get("/projects/p/compile/events", params={"timeout": 0})
+    assert parse_events(response.text) == [
+        ("status", {"status": "running"}),
+        ("timeout", {}),
+    ]
+
+def test_error_event(api, overleaf):
+    overleaf.statuses = ["running", None]
+    events = parse_events(api.get("/projects/p/compile/events").text)
+    assert events[0] == ("status", {"status": "running"})
+    assert events[1][0] == "error"
+    assert "detail" in events[1][1]
+    assert len(events) == 2
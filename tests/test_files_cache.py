@@ -0,0 +1,62 @@
+import asyncio
+
+import httpx
+import orjson
+
+from overleaf_client import COMPILE_CACHE_MAXSIZE
+
+FILES = {"files": ["main.tex"]}
+
+def test_conditional_get_reuses_listing_on_304(make_client):
+    seen = []
+
+    def handler(request):
+        seen.append((request.headers.get("if-none-match"), request.headers.get("if-modified-since")))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(
+            200,
+            headers={"ETag": '"v1"', "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"},
+            content=orjson.dumps(FILES)
+        )
+
+    async def main():
+        client = make_client(handler)
+        assert await client.get_project_files("p") == FILES
+        assert await client.get_project_files("p") == FILES
+
+    asyncio.run(main())
+    assert seen == [(None, None), ('"v1"', "Wed, 01 Jan 2025 00:00:00 GMT")]
+
+def test_listing_without_validators_is_not_cached(make_client):
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("if-none-match"))
+        return httpx.Response(200, content=orjson.dumps(FILES))
+
+    async def main():
+        client = make_client(handler)
+        await client.get_project_files("p")
+        await client.get_project_files("p")
+        assert not client._files_cache
+
+    asyncio.run(main())
+    assert seen == [None, None]
+
+def test_listing_cache_is_bounded_lru(make_client):
+    def handler(request):
+        return httpx.Response(200, headers={"ETag": '"v1"'}, content=orjson.dumps(FILES))
+
+    async def main():
+        client = make_client(handler)
+        for i in range(COMPILE_CACHE_MAXSIZE):
+            await client.get_project_files(str(i))
+        # 重新访问 0，使 1 成为最久未使用的项目
+        await client.get_project_files("0")
+        await client.get_project_files("new")
+        assert len(client._files_cache) == COMPILE_CACHE_MAXSIZE
+        assert "0" in client._files_cache
+        assert "1" not in client._files_cache
+
+    asyncio.run(main())
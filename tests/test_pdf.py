@@ -0,0 +1,109 @@
+import asyncio
+
+import httpx
+import pytest
+
+import app
+from app import _etag_matches, _pdf_headers, _tee_to_cache
+from conftest import TrackedStream
+
+def test_pdf_is_streamed_from_upstream(api, overleaf):
+    overleaf.outputs["p"] = b"%PDF-compiled-elsewhere"
+    response = api.get("/projects/p/pdf")
+    assert response.status_code == 200
+    assert response.content == b"%PDF-compiled-elsewhere"
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.headers["content-length"] == str(len(b"%PDF-compiled-elsewhere"))
+    assert response.headers["content-disposition"] == 'attachment; filename="project_p.pdf"'
+    # 不是本进程编译的输出，不附带 ETag
+    assert "etag" not in response.headers
+    assert overleaf.pdf_streams[0].closed
+
+def test_missing_pdf_is_404(api, overleaf):
+    assert api.get("/projects/p/pdf").status_code == 404
+
+def test_empty_pdf_is_error_and_closes_upstream(api, overleaf):
+    overleaf.outputs["p"] = b""
+    assert api.get("/projects/p/pdf").status_code == 500
+    assert overleaf.pdf_streams[0].closed
+
+def test_upstream_response_closed_when_client_disconnects(client):
+    stream = TrackedStream(b"%PDF-" + b"x" * 64)
+
+    async def main():
+        chunks = _tee_to_cache(client, httpx.Response(200, stream=stream), None)
+        await chunks.__anext__()
+        # 客户端中途断开时 StreamingResponse 会关闭生成器
+        await chunks.aclose()
+
+    asyncio.run(main())
+    assert stream.closed
+
+def test_pdf_after_own_compile_is_cached_with_etag(api, overleaf):
+    api.post("/projects/p/compile", params={"compiler": "xelatex"})
+    first = api.get("/projects/p/pdf")
+    assert first.status_code == 200
+    assert first.content == overleaf.pdf_for("xelatex")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, max-age=60, must-revalidate"
+
+    second = api.get("/projects/p/pdf")
+    assert second.content == first.content
+    assert second.headers["etag"] == etag
+    assert overleaf.pdf_fetches == 1
+
+    not_modified = api.get("/projects/p/pdf", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+
+    # PDF 已缓存后再次编译同一版本直接命中
+    api.post("/projects/p/compile", params={"compiler": "xelatex"})
+    assert len(overleaf.compiles) == 1
+
+def test_uncacheable_pdf_revalidates_without_fetching(api, overleaf, monkeypatch):
+    # PDF 超过缓存上限时不写入缓存，但仍可凭 ETag 重新校验
+    monkeypatch.setattr(app, "PDF_CACHE_MAX_BYTES", 4)
+    api.post("/projects/p/compile")
+    first = api.get("/projects/p/pdf")
+    assert first.content == overleaf.pdf_for("pdflatex")
+    response = api.get("/projects/p/pdf", headers={"If-None-Match": f'W/{first.headers["etag"]}'})
+    assert response.status_code == 304
+    assert overleaf.pdf_fetches == 1
+
+def test_pdf_after_file_change_has_no_etag(api, overleaf):
+    api.post("/projects/p/compile")
+    api.get("/projects/p/pdf")
+    # 文件在 Overleaf 页面上被修改（不经过本服务）
+    overleaf.version += 1
+    response = api.get("/projects/p/pdf")
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+    assert overleaf.pdf_fetches == 2
+
+def test_encoded_upstream_pdf_has_no_etag():
+    upstream = httpx.Response(200, headers={"Content-Encoding": "gzip"})
+    headers = _pdf_headers("p", upstream, etag='"pdflatex-abc"')
+    assert "ETag" not in headers
+    assert "Cache-Control" not in headers
+    assert headers["content-encoding"] == "gzip"
+
+ETAG = '"pdflatex-abc123"'
+
+@pytest.mark.parametrize("if_none_match", [
+    ETAG,
+    f"W/{ETAG}",
+    "*",
+    f'"other", {ETAG}',
+    f'"other",W/{ETAG}',
+])
+def test_etag_matches(if_none_match):
+    assert _etag_matches(if_none_match, ETAG)
+
+@pytest.mark.parametrize("if_none_match", [
+    '"other"',
+    '"pdflatex-abc"',
+    "pdflatex-abc123",
+    f'"other", "W/{ETAG}"',
+])
+def test_etag_does_not_match(if_none_match):
+    assert not _etag_matches(if_none_match, ETAG)
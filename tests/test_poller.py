@@ -0,0 +1,81 @@
+import asyncio
+
+import httpx
+import orjson
+
+def status_response(status: str) -> httpx.Response:
+    return httpx.Response(200, content=orjson.dumps({"status": status}))
+
+def test_concurrent_waiters_share_one_poll(make_client):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return status_response("running" if len(calls) < 3 else "success")
+
+    async def main():
+        client = make_client(handler)
+        results = await asyncio.gather(*(client.wait_for_compile("p", timeout=5) for _ in range(5)))
+        assert results == [True] * 5
+        assert not client._poller._tasks
+        assert not client._poller._waiters
+
+    asyncio.run(main())
+    assert len(calls) == 3
+
+def test_timeout_cancels_poll_and_cleans_up(make_client):
+    def handler(request):
+        return status_response("running")
+
+    async def main():
+        client = make_client(handler)
+        assert await client.wait_for_compile("p", timeout=0.05) is False
+        assert not client._poller._tasks
+        assert not client._poller._waiters
+
+    asyncio.run(main())
+
+def test_waiter_after_cancel_gets_fresh_poll(make_client):
+    state = {"status": "running"}
+
+    def handler(request):
+        return status_response(state["status"])
+
+    async def main():
+        client = make_client(handler)
+        assert await client.wait_for_compile("p", timeout=0.05) is False
+        # 紧接着到达的等待者不能拿到正在被取消的任务
+        state["status"] = "success"
+        assert await client.wait_for_compile("p", timeout=5) is True
+
+    asyncio.run(main())
+
+def test_compile_started_forces_fresh_poll(make_client):
+    async def main():
+        release = asyncio.Event()
+        requests = []
+
+        async def handler(request):
+            requests.append(request)
+            if len(requests) == 1:
+                # 第一次轮询读到的是上一次编译的结果
+                await release.wait()
+                return status_response("error")
+            return status_response("success")
+
+        client = make_client(handler)
+        poller = client._poller
+        first = asyncio.create_task(poller.wait("p"))
+        await asyncio.sleep(0)
+        stale_task = poller._tasks["p"][1]
+
+        poller.compile_started("p")
+        second = asyncio.create_task(poller.wait("p"))
+        await asyncio.sleep(0)
+        assert poller._tasks["p"][1] is not stale_task
+
+        release.set()
+        assert (await first)["status"] == "error"
+        assert (await second)["status"] == "success"
+
+    asyncio.run(main())
@@ -0,0 +1,24 @@
+def test_render_compiles_and_returns_pdf(api, overleaf):
+    response = api.post("/projects/p/render", params={"compiler": "xelatex"})
+    assert response.status_code == 200
+    assert response.content == overleaf.pdf_for("xelatex")
+    assert response.headers["content-type"] == "application/pdf"
+    assert overleaf.compiles == [("p", "xelatex")]
+    assert overleaf.pdf_streams[0].closed
+
+def test_render_reuses_cached_pdf(api, overleaf):
+    first = api.post("/projects/p/render")
+    second = api.post("/projects/p/render")
+    assert second.status_code == 200
+    assert second.content == first.content == overleaf.pdf_for("pdflatex")
+    assert overleaf.compiles == [("p", "pdflatex")]
+    assert overleaf.pdf_fetches == 1
+
+def test_render_compile_error(api, overleaf):
+    overleaf.compile_status = "error"
+    assert api.post("/projects/p/render").status_code == 500
+    assert overleaf.pdf_fetches == 0
+
+def test_render_rejects_unknown_compiler(api, overleaf):
+    assert api.post("/projects/p/render", params={"compiler": "troff"}).status_code == 422
+    assert not overleaf.compiles
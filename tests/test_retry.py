@@ -0,0 +1,144 @@
+import asyncio
+import time
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+import overleaf_client
+from overleaf_client import (
+    NO_RETRY_EXTENSION,
+    RETRY_JITTER,
+    RETRY_MAX_ATTEMPTS,
+    RETRY_MAX_DELAY,
+    _retry_delay,
+    _RetryTransport,
+)
+
+@pytest.fixture
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(overleaf_client.random, "uniform", lambda a, b: 0.0)
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """
+    记录重试等待时间而不真正睡眠
+    """
+    recorded = []
+
+    async def fake_sleep(delay):
+        recorded.append(delay)
+
+    monkeypatch.setattr(overleaf_client.asyncio, "sleep", fake_sleep)
+    return recorded
+
+async def _send(handler, method="GET", **kwargs):
+    async with httpx.AsyncClient(transport=_RetryTransport(httpx.MockTransport(handler))) as client:
+        return await client.request(method, "https://overleaf.test/x", **kwargs)
+
+def counting_handler(statuses):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        status = statuses[min(len(calls), len(statuses)) - 1]
+        return httpx.Response(status, headers={"Retry-After": "0"})
+
+    return handler, calls
+
+# _retry_delay
+
+def test_retry_delay_numeric_retry_after(no_jitter):
+    response = httpx.Response(503, headers={"Retry-After": "3"})
+    assert _retry_delay(response, 0) == 3.0
+
+def test_retry_delay_http_date_retry_after(no_jitter):
+    response = httpx.Response(503, headers={"Retry-After": formatdate(time.time() + 5, usegmt=True)})
+    assert 3.0 < _retry_delay(response, 0) <= 5.0
+
+def test_retry_delay_past_http_date_is_zero(no_jitter):
+    response = httpx.Response(503, headers={"Retry-After": formatdate(time.time() - 60, usegmt=True)})
+    assert _retry_delay(response, 0) == 0.0
+
+def test_retry_delay_falls_back_to_backoff(no_jitter):
+    assert _retry_delay(httpx.Response(503), 0) == 1.0
+    assert _retry_delay(httpx.Response(503), 2) == 4.0
+    assert _retry_delay(httpx.Response(503, headers={"Retry-After": "soon"}), 1) == 2.0
+
+def test_retry_delay_is_capped():
+    response = httpx.Response(503, headers={"Retry-After": "3600"})
+    assert RETRY_MAX_DELAY <= _retry_delay(response, 0) <= RETRY_MAX_DELAY + RETRY_JITTER
+
+# _RetryTransport
+
+@pytest.mark.parametrize("status", [429, 503])
+@pytest.mark.parametrize("method", ["GET", "POST"])
+def test_retries_throttled_statuses_for_any_method(status, method, sleeps):
+    handler, calls = counting_handler([status, 200])
+    response = asyncio.run(_send(handler, method, content=b"{}"))
+    assert response.status_code == 200
+    assert len(calls) == 2
+
+@pytest.mark.parametrize("status", [502, 504])
+def test_retries_gateway_errors_for_idempotent_methods(status, sleeps):
+    handler, calls = counting_handler([status, 200])
+    response = asyncio.run(_send(handler, "GET"))
+    assert response.status_code == 200
+    assert len(calls) == 2
+
+@pytest.mark.parametrize("status", [502, 504])
+def test_does_not_retry_gateway_errors_for_post(status, sleeps):
+    handler, calls = counting_handler([status, 200])
+    response = asyncio.run(_send(handler, "POST", content=b"{}"))
+    assert response.status_code == status
+    assert len(calls) == 1
+
+def test_does_not_retry_other_errors(sleeps):
+    handler, calls = counting_handler([500, 200])
+    assert asyncio.run(_send(handler)).status_code == 500
+    assert len(calls) == 1
+
+def test_gives_up_after_max_attempts(sleeps):
+    handler, calls = counting_handler([503])
+    assert asyncio.run(_send(handler)).status_code == 503
+    assert len(calls) == RETRY_MAX_ATTEMPTS + 1
+
+def test_does_not_retry_streaming_body(sleeps):
+    async def body():
+        yield b"chunk"
+
+    handler, calls = counting_handler([503, 200])
+    assert asyncio.run(_send(handler, "PUT", content=body())).status_code == 503
+    assert len(calls) == 1
+
+def test_no_retry_extension(sleeps):
+    handler, calls = counting_handler([503, 200])
+    response = asyncio.run(_send(handler, extensions={NO_RETRY_EXTENSION: True}))
+    assert response.status_code == 503
+    assert len(calls) == 1
+
+def test_total_retry_budget(sleeps):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503, headers={"Retry-After": "6"})
+
+    assert asyncio.run(_send(handler)).status_code == 503
+    # 第一次等待 6 秒后，再等 6 秒会超出 10 秒的总预算
+    assert len(calls) == 2
+    assert len(sleeps) == 1
+
+def test_health_check_is_not_retried(make_client, sleeps):
+    handler, calls = counting_handler([503, 200])
+    client = make_client(handler)
+    assert asyncio.run(client.health_check()) is False
+    assert len(calls) == 1
+
+def test_project_files_failure_is_logged(make_client, sleeps, caplog):
+    handler, _ = counting_handler([503])
+    client = make_client(handler)
+    with caplog.at_level("WARNING", logger="overleaf_client"):
+        with pytest.raises(RuntimeError):
+            asyncio.run(client.get_project_files("p"))
+    assert any("获取文件列表失败" in record.getMessage() for record in caplog.records)
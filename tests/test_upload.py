@@ -0,0 +1,74 @@
+import asyncio
+
+import httpx
+
+from overleaf_client import _multipart_stream
+
+async def _collect(file_name: str, content: bytes = b"x") -> bytes:
+    async def body():
+        yield content
+
+    return b"".join([chunk async for chunk in _multipart_stream(body(), "b0undary", file_name)])
+
+def test_multipart_body():
+    body = asyncio.run(_collect("notes.txt", b"hello"))
+    assert body == (
+        b"--b0undary\r\n"
+        b'Content-Disposition: form-data; name="file"; filename="notes.txt"\r\n'
+        b"Content-Type: text/plain\r\n\r\n"
+        b"hello"
+        b"\r\n--b0undary--\r\n"
+    )
+
+def test_multipart_file_name_cannot_inject_headers():
+    body = asyncio.run(_collect('a.tex"\r\nX-Injected: 1\r\n\r\nevil'))
+    headers, _, rest = body.partition(b"\r\n\r\n")
+    lines = headers.split(b"\r\n")
+    assert len(lines) == 3
+    assert lines[1] == b'Content-Disposition: form-data; name="file"; filename="a.tex%22%0D%0AX-Injected: 1%0D%0A%0D%0Aevil"'
+    assert rest == b"x\r\n--b0undary--\r\n"
+
+def test_raw_upload_is_wrapped_as_multipart(api, overleaf):
+    response = api.post("/projects/p/files", params={"file_name": "notes.txt"}, content=b"hello")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+    project_id, content_type, body = overleaf.uploads[0]
+    assert project_id == "p"
+    boundary = content_type.split("boundary=")[1]
+    assert body.startswith(f"--{boundary}\r\n".encode())
+    assert b'filename="notes.txt"' in body
+    assert body.endswith(f"\r\nhello\r\n--{boundary}--\r\n".encode())
+
+def test_multipart_upload_is_forwarded_unchanged(api, overleaf):
+    content = (
+        b"--xyz\r\n"
+        b'Content-Disposition: form-data; name="file"; filename="main.tex"\r\n\r\n'
+        b"body\r\n--xyz--\r\n"
+    )
+    response = api.post(
+        "/projects/p/files",
+        content=content,
+        headers={"Content-Type": "multipart/form-data; boundary=xyz"}
+    )
+    assert response.status_code == 200
+    assert overleaf.uploads == [("p", "multipart/form-data; boundary=xyz", content)]
+
+def test_multipart_upload_rejects_file_name(api, overleaf):
+    response = api.post(
+        "/projects/p/files",
+        params={"file_name": "other.tex"},
+        content=b"--xyz--\r\n",
+        headers={"Content-Type": "multipart/form-data; boundary=xyz"}
+    )
+    assert response.status_code == 400
+    assert not overleaf.uploads
+
+def test_raw_upload_requires_file_name(api, overleaf):
+    response = api.post("/projects/p/files", content=b"hello")
+    assert response.status_code == 400
+    assert not overleaf.uploads
+
+def test_non_json_upstream_reply_is_server_error(api, overleaf):
+    overleaf.upload_response = httpx.Response(502, content=b"<html>Bad Gateway</html>")
+    response = api.post("/projects/p/files", params={"file_name": "notes.txt"}, content=b"hello")
+    assert response.status_code == 500
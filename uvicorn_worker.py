@@ -0,0 +1,15 @@
+from uvicorn.workers import UvicornWorker as _UvicornWorker
+
+
+class UvicornWorker(_UvicornWorker):
+    """
+    生产环境使用的 Uvicorn worker
+
+    Gunicorn 不会把 worker_connections 等参数传给 Uvicorn，
+    事件循环、HTTP 解析器和并发上限需要通过 CONFIG_KWARGS 指定
+    """
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "limit_concurrency": 1000
+    }